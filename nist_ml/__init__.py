@@ -0,0 +1,20 @@
+"""Machine learning approaches to predict various NIST properties."""
+
+import asyncio
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+def run(main: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion, on a uvloop event loop if installed."""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(main)
+    if not hasattr(asyncio, "Runner"):  # Python < 3.11
+        uvloop.install()
+        return asyncio.run(main)
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        return runner.run(main)
@@ -1,15 +1,61 @@
 """Scraper for NIST WebBook to collect chemical formula hrefs and mask hrefs."""
 
-from dataclasses import dataclass, field
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from pathlib import Path
 import asyncio
+import codecs
+import importlib.util
+import os
 import re
-import aiohttp
-from logging import getLogger
+import sqlite3
+import sys
+import time
+from typing import TYPE_CHECKING, BinaryIO
+import httpx
+import orjson
+from selectolax.lexbor import LexborHTMLParser, LexborNode
+
+try:
+    from picologging import getLogger
+except ImportError:
+    from logging import getLogger
+
+if TYPE_CHECKING:
+    import pyarrow as pa
 
 logger = getLogger(__name__)
 
 WEBBOOK_URL = "https://webbook.nist.gov"
 
+# httpx only decodes brotli responses when one of these packages is installed
+_BROTLI_AVAILABLE = any(
+    importlib.util.find_spec(name) is not None for name in ("brotli", "brotlicffi")
+)
+
+HEADERS = {
+    "Accept-Encoding": "br, gzip, deflate" if _BROTLI_AVAILABLE else "gzip, deflate",
+    "User-Agent": "nist-ml/0.1",
+}
+
+# Status codes that mark a page as permanently gone rather than a transient failure
+DEAD_STATUS_CODES = (404, 410)
+
+# Attempts per index group before collect_all_formula_hrefs gives up on it
+MAX_INDEX_ATTEMPTS = 6
+
+# Upper bound in seconds on the backoff before retrying a failed index group
+MAX_RETRY_DELAY = 60
+
+# Characters of already-scanned HTML rescanned when streaming a new chunk
+_STREAM_OVERLAP = 1024
+
+# Parts of a spectrum link rewritten to form its JCAMP download href
+_JCAMP_RE = re.compile(r"Spec=|ID=|&amp;Type=IR-SPEC|&amp;Type=IR|#IR-SPEC")
+
 
 @dataclass
 class ChemicalMetadata:
@@ -25,206 +71,659 @@ class ChemicalMetadata:
     jcamp_hrefs: list[str] = field(default_factory=list)
 
 
+MetadataSink = Callable[[ChemicalMetadata], Awaitable[None]]
+
+
+def jsonl_sink(f: BinaryIO) -> MetadataSink:
+    """Return a sink that writes each record to a binary file as a JSON line."""
+
+    async def write(chemical_metadata: ChemicalMetadata) -> None:
+        f.write(orjson.dumps(chemical_metadata) + b"\n")
+
+    return write
+
+
+def _arrow_schema() -> "pa.Schema":
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("href", pa.large_string()),
+            ("name", pa.large_string()),
+            ("formula", pa.large_string()),
+            ("weight", pa.float64()),
+            ("inchi", pa.large_string()),
+            ("inchi_key", pa.large_string()),
+            ("cas", pa.large_string()),
+            ("jcamp_hrefs", pa.list_(pa.string())),
+        ]
+    )
+
+
+def to_arrow(records: Iterable[ChemicalMetadata]) -> "pa.Table":
+    """Convert records into a column-oriented pyarrow Table (requires pyarrow)."""
+    import pyarrow as pa
+
+    names = [f.name for f in fields(ChemicalMetadata)]
+    columns: dict[str, list] = {name: [] for name in names}
+    for record in records:
+        for name in names:
+            columns[name].append(getattr(record, name))
+    return pa.table(columns, schema=_arrow_schema())
+
+
+def write_parquet(records: Iterable[ChemicalMetadata], path: str | Path) -> None:
+    """Write records to a zstd-compressed Parquet file (requires pyarrow)."""
+    import pyarrow.parquet as pq
+
+    pq.write_table(to_arrow(records), path, compression="zstd")
+
+
+class ArrowStreamSink:
+    """Sink that appends records to an Arrow IPC stream file in batches.
+
+    Use as a context manager so the last partial batch is flushed on exit.
+    """
+
+    def __init__(self, path: str | Path, batch_size: int = 1024):
+        import pyarrow as pa
+
+        self.batch_size = batch_size
+        self._buffer: list[ChemicalMetadata] = []
+        self._writer = pa.ipc.new_stream(str(path), _arrow_schema())
+
+    async def __call__(self, chemical_metadata: ChemicalMetadata) -> None:
+        self._buffer.append(chemical_metadata)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._writer.write_table(to_arrow(self._buffer))
+            self._buffer.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self) -> "ArrowStreamSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+@dataclass
+class CachedPage:
+    """A page body stored with its HTTP validators."""
+
+    body: str
+    etag: str | None
+    last_modified: str | None
+    ts: float
+
+
+class PageCache:
+    """SQLite-backed cache of fetched pages and dead hrefs, kept across runs.
+
+    Pages younger than `page_max_age` are served without a request; older
+    ones are revalidated with a conditional GET. Dead hrefs are skipped for
+    `dead_max_age`.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        page_max_age: float = 7 * 86400,
+        dead_max_age: float = 86400,
+    ):
+        self.page_max_age = page_max_age
+        self.dead_max_age = dead_max_age
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages "
+            "(href TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body TEXT, ts REAL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS dead_hrefs "
+            "(href TEXT PRIMARY KEY, status INTEGER, ts REAL)"
+        )
+        self._db.commit()
+
+    def get_page(self, href: str) -> CachedPage | None:
+        """Return the cached page for the href, if any."""
+        row = self._db.execute(
+            "SELECT body, etag, last_modified, ts FROM pages WHERE href = ?", (href,)
+        ).fetchone()
+        return CachedPage(*row) if row is not None else None
+
+    def put_page(
+        self,
+        href: str,
+        body: str,
+        etag: str | None,
+        last_modified: str | None,
+    ) -> None:
+        """Store a freshly fetched page and its validators."""
+        self._db.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+            (href, etag, last_modified, body, time.time()),
+        )
+        self._db.commit()
+
+    def touch_page(self, href: str) -> None:
+        """Mark a cached page as fresh after the server confirmed it unchanged."""
+        self._db.execute("UPDATE pages SET ts = ? WHERE href = ?", (time.time(), href))
+        self._db.commit()
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        """Return True if the page can be served without revalidation."""
+        return time.time() - page.ts < self.page_max_age
+
+    def is_dead(self, href: str) -> bool:
+        """Return True if the href recently returned a dead status."""
+        row = self._db.execute(
+            "SELECT ts FROM dead_hrefs WHERE href = ?", (href,)
+        ).fetchone()
+        return row is not None and time.time() - row[0] < self.dead_max_age
+
+    def mark_dead(self, href: str, status: int) -> None:
+        """Record that the href returned a dead status."""
+        self._db.execute(
+            "INSERT OR REPLACE INTO dead_hrefs VALUES (?, ?, ?)",
+            (href, status, time.time()),
+        )
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def _conditional_headers(cached: CachedPage | None) -> dict[str, str]:
+    """Return the headers revalidating a cached page, if there is one."""
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+    return headers
+
+
 async def fetch_html(
-    session: aiohttp.ClientSession,
+    client: httpx.AsyncClient,
+    href: str,
+    cache: PageCache | None = None,
+) -> str | None:
+    """Asynchronously fetch HTML content from a URL.
+
+    With a cache, recent pages are served from disk and older ones are
+    revalidated with If-None-Match/If-Modified-Since. Returns None if the
+    page is gone (404/410), either now or in the cache.
+    """
+    if cache is None:
+        cached = None
+    elif cache.is_dead(href):
+        return None
+    else:
+        cached = cache.get_page(href)
+        if cached is not None and cache.is_fresh(cached):
+            return cached.body
+
+    response = await client.get(
+        f"{WEBBOOK_URL}{href}", headers=_conditional_headers(cached)
+    )
+    if response.status_code == 304 and cache is not None and cached is not None:
+        cache.touch_page(href)
+        return cached.body
+    if response.status_code in DEAD_STATUS_CODES:
+        if cache is not None:
+            cache.mark_dead(href, response.status_code)
+        return None
+    response.raise_for_status()  # Raises HTTPStatusError for bad responses
+    html = response.text
+    if cache is not None:
+        cache.put_page(
+            href,
+            html,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+    return html
+
+
+async def fetch_html_until(
+    client: httpx.AsyncClient,
     href: str,
-) -> str:
-    """Asynchronously fetch HTML content from a URL."""
-    url = f"{WEBBOOK_URL}{href}"
-    async with session.get(
-        url, timeout=10
-    ) as response:  # Set a timeout for the request
-        response.raise_for_status()  # Raises HTTPError for bad responses
-        return await response.text()
+    pattern: re.Pattern[str],
+    cache: PageCache | None = None,
+) -> re.Match[str] | None:
+    """Stream a page and return the first match of pattern, stopping early.
+
+    The rest of the body is not downloaded once the pattern matches. Matches
+    are assumed to be shorter than _STREAM_OVERLAP characters. With a cache,
+    a fresh page is searched without a request and a stale one is
+    revalidated like in fetch_html. Bodies streamed to the end without a
+    match are complete and are stored; bodies cut short by a match are not.
+    """
+    if cache is None:
+        cached = None
+    elif cache.is_dead(href):
+        return None
+    else:
+        cached = cache.get_page(href)
+        if cached is not None and cache.is_fresh(cached):
+            return pattern.search(cached.body)
+
+    html = ""
+    async with client.stream(
+        "GET", f"{WEBBOOK_URL}{href}", headers=_conditional_headers(cached)
+    ) as response:
+        if response.status_code == 304 and cache is not None and cached is not None:
+            cache.touch_page(href)
+            return pattern.search(cached.body)
+        if response.status_code in DEAD_STATUS_CODES:
+            if cache is not None:
+                cache.mark_dead(href, response.status_code)
+            return None
+        response.raise_for_status()
+        decoder = codecs.getincrementaldecoder(response.encoding)("replace")
+        async for chunk in response.aiter_bytes(8192):
+            # Only rescan the tail that could hold a match cut by the last chunk
+            pos = max(0, len(html) - _STREAM_OVERLAP)
+            html += decoder.decode(chunk)
+            match = pattern.search(html, pos)
+            if match:
+                return match
+        html += decoder.decode(b"", final=True)
+        if cache is not None:
+            cache.put_page(
+                href,
+                html,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            )
+    return None
+
+
+@lru_cache
+def _label_re(label: str) -> re.Pattern[str]:
+    """Return the compiled pattern for an <a> tag with the given label."""
+    return re.compile(rf'<a href="([^"]+)">{re.escape(label)}</a>')
+
+
+def _href(node: LexborNode) -> str:
+    """Return the href of an <a> node, re-escaped as it appears in the raw HTML."""
+    # The parser decodes "&amp;" but the hrefs we store keep the HTML escaping
+    return (node.attributes.get("href") or "").replace("&", "&amp;")
+
+
+def _list_item_value(node: LexborNode | None) -> str | None:
+    """Return the inner HTML after the <strong> label of the enclosing <li>."""
+    while node is not None and node.tag != "li":
+        node = node.parent
+    if node is None or "</strong>" not in node.html:
+        return None
+    return node.html.split("</strong>", 1)[1].removesuffix("</li>").strip()
+
+
+def _normalize_jcamp_part(match: re.Match[str]) -> str:
+    return "JCAMP=" if match.group() in ("Spec=", "ID=") else ""
+
+
+def _parse_chemical_metadata(html: str, href: str) -> ChemicalMetadata:
+    """Parse the jcamp hrefs and metadata out of a detail page.
+
+    Like hrefs, text fields keep their HTML markup and escaping (e.g. "&amp;",
+    "<sub>") rather than being decoded to plain text.
+    """
+    chemical_metadata = ChemicalMetadata(href=href)
+    tree = LexborHTMLParser(html)
+
+    title = tree.css_first("title")
+    if title is not None:
+        chemical_metadata.name = title.inner_html.strip()
+
+    chemical_metadata.formula = _list_item_value(
+        tree.css_first('a[title="IUPAC definition of empirical formula"]')
+    )
+    weight = _list_item_value(
+        tree.css_first(
+            'a[title="IUPAC definition of relative molecular mass (molecular weight)"]'
+        )
+    )
+    if weight:
+        chemical_metadata.weight = float(weight)
+
+    for strong in tree.css("strong"):
+        label = strong.text(strip=True)
+        if label in (
+            "IUPAC Standard InChI:",
+            "IUPAC Standard InChIKey:",
+        ):
+            span = strong.parent.css_first("span.inchi-text")
+            if span is None:
+                continue
+            if label == "IUPAC Standard InChI:":
+                chemical_metadata.inchi = span.inner_html.strip()
+            else:
+                chemical_metadata.inchi_key = span.inner_html.strip()
+        elif "CAS Registry Number" in label:
+            chemical_metadata.cas = _list_item_value(strong)
+
+    for node in tree.css('a[href*="Index="]'):
+        # Remove unnecessary parts and normalize
+        jcamp_href = _JCAMP_RE.sub(
+            _normalize_jcamp_part, _href(node).split("&amp;Large=on")[0]
+        )
+
+        # Ensure type is IR
+        jcamp_href += "&amp;Type=IR"
+        if jcamp_href not in chemical_metadata.jcamp_hrefs:
+            chemical_metadata.jcamp_hrefs.append(jcamp_href)
+    return chemical_metadata
 
 
 class NISTScraper:
-    def __init__(self, max_concurrent_requests: int = 40):
+    def __init__(
+        self,
+        max_concurrent_requests: int = 40,
+        cache_path: str | Path | None = None,
+    ):
         self.max_concurrent_requests = max_concurrent_requests
-        self.semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        self.cache_path = cache_path
+        self._in_flight = 0
+        self._slot_available = asyncio.Condition()
+        self._client: httpx.AsyncClient | None = None
+        self._cache: PageCache | None = None
+        self._pool: ProcessPoolExecutor | None = None
+        # Bounds how many fetched bodies wait on or sit in the parse pool
+        self._parse_slots = asyncio.Semaphore(2 * (os.cpu_count() or 1))
+
+    async def __aenter__(self) -> "NISTScraper":
+        """Open a single HTTP/2 client shared by all scraping phases."""
+        # Requests to the host are multiplexed over HTTP/2; _slot() stays
+        # as the actual concurrency gate since httpx limits are not. The
+        # connection count is left unbounded so that raising the gate with
+        # set_concurrency() is not throttled by the pool on an HTTP/1.1
+        # fallback. DNS and TLS setup only happen when the pool opens a
+        # connection, and failed connects are retried on the transport.
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=2,
+            limits=httpx.Limits(
+                max_connections=None,
+                max_keepalive_connections=self.max_concurrent_requests,
+                keepalive_expiry=75,
+            ),
+        )
+        # Follow redirects like aiohttp did; httpx does not by default
+        self._client = httpx.AsyncClient(
+            transport=transport,
+            headers=HEADERS,
+            timeout=10.0,
+            follow_redirects=True,
+            default_encoding="utf-8",
+        )
+        if self.cache_path is not None:
+            self._cache = PageCache(self.cache_path)
+        self._pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Close the shared client and its connections."""
+        if self._client is not None:
+            await self._client.aclose()
+        if self._cache is not None:
+            self._cache.close()
+        if self._pool is not None:
+            # Join the worker processes without blocking the event loop
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._pool.shutdown)
+        self._client = None
+        self._cache = None
+        self._pool = None
+
+    async def set_concurrency(self, max_concurrent_requests: int) -> None:
+        """Change the number of requests allowed in flight at once.
+
+        Lowering the limit lets in-flight requests finish; no new ones start
+        until the count drops below the new limit.
+        """
+        if max_concurrent_requests < 1:
+            msg = f"max_concurrent_requests must be at least 1, got {max_concurrent_requests}"
+            raise ValueError(msg)
+        async with self._slot_available:
+            grew = max_concurrent_requests > self.max_concurrent_requests
+            self.max_concurrent_requests = max_concurrent_requests
+            if grew:
+                self._slot_available.notify_all()
+
+    async def _acquire(self) -> None:
+        async with self._slot_available:
+            await self._slot_available.wait_for(
+                lambda: self._in_flight < self.max_concurrent_requests
+            )
+            self._in_flight += 1
+
+    async def _release(self) -> None:
+        async with self._slot_available:
+            self._in_flight -= 1
+            self._slot_available.notify(1)
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        """Hold one of the max_concurrent_requests request slots."""
+        await self._acquire()
+        try:
+            yield
+        finally:
+            await self._release()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client; only available inside `async with NISTScraper()`."""
+        self._ensure_open()
+        assert self._client is not None
+        return self._client
+
+    def _ensure_open(self) -> None:
+        """Raise unless inside `async with NISTScraper()`.
+
+        The collect_* methods call this up front since the per-href error
+        handling would otherwise swallow the error for every href.
+        """
+        if self._client is None:
+            raise RuntimeError("NISTScraper must be used as an async context manager")
 
     async def _fetch_index_hrefs(
         self,
-        session: aiohttp.ClientSession,
         href: str,
     ) -> tuple[set[str], set[str], set[str]]:
         """Extract formula and group hrefs from a given page."""
         try:
-            async with self.semaphore:
-                html = await fetch_html(session, href)
+            async with self._slot():
+                html = await fetch_html(self.client, href, self._cache)
+                if html is None:
+                    # Dead pages are not re-queued as failed
+                    return set(), set(), set()
                 formula_hrefs: set[str] = set()
                 group_hrefs: set[str] = set()
-                for line in html.split("\n"):
-                    if line.startswith('<li><a href="/cgi/'):
-                        sub_href = line.split('"')[1]
-                        if "species" in line:
-                            group_hrefs.add(sub_href)
-                        else:
-                            formula_hrefs.add(sub_href)
+                tree = LexborHTMLParser(html)
+                for node in tree.css('li > a[href^="/cgi/"]'):
+                    sub_href = _href(node)
+                    if "species" in sub_href:
+                        group_hrefs.add(sub_href)
+                    else:
+                        formula_hrefs.add(sub_href)
                 return formula_hrefs, group_hrefs, set()
         except Exception as e:
-            logger.error(f"Failed to process {href}: {str(e)}")
+            logger.error("Failed to process %s: %s", href, e)
             return set(), set(), {href}
 
     async def collect_all_formula_hrefs(
         self,
         start_href: str = "/cgi/formula/",
     ) -> set[str]:
-        """Collect all formula hrefs starting from the given href."""
-        async with aiohttp.ClientSession() as session:
-            (
-                formula_hrefs,
-                groups_to_search,
-                failed_hrefs,
-            ) = await self._fetch_index_hrefs(session, start_href)
-
-            iteration = 0
-            seen_groups: set[str] = set()
-
-            while groups_to_search:
-                iteration += 1
-                info_msg = f"Iteration {iteration}: {len(formula_hrefs)} entries, {len(groups_to_search)} groups remaining, {len(failed_hrefs)} failed on last attempt"
-                logger.info(info_msg)
-
-                # Create tasks for all groups to search
-                tasks = [
-                    self._fetch_index_hrefs(session, group)
-                    for group in groups_to_search
-                ]
-
-                # Execute all tasks concurrently and gather results
-                outputs = await asyncio.gather(*tasks)
-
-                # Process the results
-                new_formula_hrefs = set().union(*(e for e, _, _ in outputs))
-                new_groups_to_search = set().union(*(g for _, g, _ in outputs))
-                failed_hrefs = set().union(*(f for _, _, f in outputs))
-
-                formula_hrefs.update(new_formula_hrefs)
-
-                seen_groups.update(groups_to_search - failed_hrefs)
-                groups_to_search = new_groups_to_search | failed_hrefs - seen_groups
-
-                if iteration > 100:
-                    msg = (
-                        f"Unable to fetch formula hrefs for groups: {groups_to_search}"
-                    )
-                    logger.error(msg)
-                    break
-
-            return formula_hrefs
-
-    async def _fetch_spectrum_href_by_label(
+        """Collect all formula hrefs starting from the given href.
+
+        Groups are fetched as soon as they are discovered instead of level by
+        level, so a few slow pages do not hold back the rest of the crawl.
+        Failed groups are retried up to MAX_INDEX_ATTEMPTS times, waiting
+        exponentially longer (capped at MAX_RETRY_DELAY seconds) each time.
+        """
+        self._ensure_open()
+        formula_hrefs: set[str] = set()
+        seen_groups: set[str] = {start_href}
+        attempts: dict[str, int] = {}
+        pending: dict[asyncio.Task, str] = {}
+        completed = 0
+
+        async def fetch(
+            group: str, delay: float
+        ) -> tuple[set[str], set[str], set[str]]:
+            # Back off without holding a request slot
+            await asyncio.sleep(delay)
+            return await self._fetch_index_hrefs(group)
+
+        def search(group: str, delay: float = 0) -> None:
+            attempts[group] = attempts.get(group, 0) + 1
+            pending[asyncio.create_task(fetch(group, delay))] = group
+
+        search(start_href)
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    group = pending.pop(task)
+                    new_formula_hrefs, new_groups, failed = task.result()
+                    formula_hrefs |= new_formula_hrefs
+
+                    new_groups -= seen_groups
+                    seen_groups |= new_groups
+                    for new_group in new_groups:
+                        search(new_group)
+
+                    if failed and attempts[group] < MAX_INDEX_ATTEMPTS:
+                        search(group, min(2 ** attempts[group], MAX_RETRY_DELAY))
+                    elif failed:
+                        logger.error(
+                            "Unable to fetch formula hrefs for group: %s", group
+                        )
+
+                    completed += 1
+                    if completed % 100 == 0:
+                        logger.info(
+                            "%d groups searched: %d entries, %d groups pending",
+                            completed,
+                            len(formula_hrefs),
+                            len(pending),
+                        )
+        finally:
+            # Do not leave group fetches running if we were cancelled
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        return formula_hrefs
+
+    async def _fetch_href_by_label(
         self,
-        session: aiohttp.ClientSession,
         href: str,
+        label: str = "IR Spectrum",
     ) -> str | None:
         """Fetch a detail page and return the href of the <a> tag with given label."""
         try:
-            async with self.semaphore:
-                html = await fetch_html(session, href)
-                pattern = rf'<a href="([^"]+)">{re.escape("IR Spectrum")}</a>'
-                match = re.search(pattern, html)
+            async with self._slot():
+                match = await fetch_html_until(
+                    self.client, href, _label_re(label), self._cache
+                )
                 if match:
                     return match.group(1)
         except Exception:
-            logger.exception(f"Error fetching {href}")
+            logger.exception("Error fetching %s", href)
         return None
 
-    async def collect_spectrum_hrefs_by_label(
+    async def collect_hrefs_by_label(
         self,
-        hrefs: set[str],
+        hrefs: Iterable[str],
+        label: str = "IR Spectrum",
     ) -> set[str]:
         """Collect mask hrefs for all given detail page hrefs with a specific label."""
-        async with aiohttp.ClientSession() as session:
-            tasks = []
-            for href in hrefs:
-                tasks.append(self._fetch_spectrum_href_by_label(session, href))
-            all_results = await asyncio.gather(*tasks)
-            results = {r for r in all_results if r}
+        self._ensure_open()
+        tasks = []
+        for href in hrefs:
+            tasks.append(self._fetch_href_by_label(href, label))
+        all_results = await asyncio.gather(*tasks)
+        results = {r for r in all_results if r}
         return results
 
     async def collect_chemical_metadata(
         self,
-        hrefs: set[str],
-    ) -> list[ChemicalMetadata]:
-        """Collect jcamp hrefs and metadata for all given detail page hrefs."""
-        async with aiohttp.ClientSession() as session:
-            tasks = []
-            for href in hrefs:
-                tasks.append(self._fetch_chemical_metadata(session, href))
-            all_results = await asyncio.gather(*tasks)
-            results = [m for m in all_results if m]
-        return results
+        hrefs: Iterable[str],
+        sink: MetadataSink | str | Path,
+    ) -> int:
+        """Stream jcamp hrefs and metadata for all given detail page hrefs to a sink.
+
+        `sink` is either an async callable receiving each record as soon as it
+        is parsed, or a path to write the records to as JSON lines. Records are
+        not kept in memory. Returns the number of records written.
+        """
+        self._ensure_open()
+        if isinstance(sink, (str, Path)):
+            with open(sink, "wb") as f:
+                return await self.collect_chemical_metadata(hrefs, jsonl_sink(f))
+
+        tasks = [
+            asyncio.create_task(self._fetch_chemical_metadata(href)) for href in hrefs
+        ]
+        count = 0
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                chemical_metadata = await next_result
+                if chemical_metadata:
+                    await sink(chemical_metadata)
+                    count += 1
+        finally:
+            # Do not leave fetches running if we were cancelled or the sink failed
+            unfinished = [task for task in tasks if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+        return count
 
     async def _fetch_chemical_metadata(
         self,
-        session: aiohttp.ClientSession,
         href: str,
     ) -> ChemicalMetadata | None:
         """Fetch a detail page and return the jcamp href and metadata."""
         try:
-            async with self.semaphore:
-                chemical_metadata = ChemicalMetadata(href=href)
-                html = await fetch_html(session, href)
-                lines = html.splitlines()
-                for i, line in enumerate(lines):
-                    if line.startswith("<title>"):
-                        chemical_metadata.name = line.removeprefix(
-                            "<title>"
-                        ).removesuffix("</title>")
-                    elif line == ' title="IUPAC definition of empirical formula"':
-                        chemical_metadata.formula = (
-                            lines[i + 1].split("</strong> ")[1].removesuffix("</li>")
-                        )
-                    elif (
-                        line
-                        == ' title="IUPAC definition of relative molecular mass (molecular weight)"'
-                    ):
-                        chemical_metadata.weight = float(
-                            lines[i + 1].split("</strong> ")[1].removesuffix("</li>")
-                        )
-                    elif line == "<strong>IUPAC Standard InChI:</strong>":
-                        chemical_metadata.inchi = (
-                            lines[i + 1]
-                            .split('"inchi-text">')[1]
-                            .removesuffix("</span>")
-                        )
-                    elif line == "<strong>IUPAC Standard InChIKey:</strong>":
-                        chemical_metadata.inchi_key = (
-                            lines[i + 1]
-                            .split('"inchi-text">')[1]
-                            .removesuffix("</span>")
-                        )
-                    elif "CAS Registry Number" in line:
-                        chemical_metadata.cas = line.split("</strong> ")[
-                            1
-                        ].removesuffix("</li>")
-                    elif "Index=" in line:
-                        for quote in ("'", '"'):
-                            if quote in line:
-                                jcamp_href = line.split(quote)[1]
-                                break
-                        else:
-                            continue
-
-                        # Remove unnecessary parts and normalize
-                        jcamp_href = jcamp_href.split("&amp;Large=on")[0]
-                        for old, new in [
-                            ("Spec=", "JCAMP="),
-                            ("ID=", "JCAMP="),
-                            ("&amp;Type=IR-SPEC", ""),
-                            ("&amp;Type=IR", ""),
-                            ("#IR-SPEC", ""),
-                        ]:
-                            jcamp_href = jcamp_href.replace(old, new)
-
-                        # Ensure type is IR
-                        jcamp_href += "&amp;Type=IR"
-                        if jcamp_href not in chemical_metadata.jcamp_hrefs:
-                            chemical_metadata.jcamp_hrefs.append(jcamp_href)
-                return chemical_metadata
-
+            async with self._slot():
+                html = await fetch_html(self.client, href, self._cache)
+                if html is None:
+                    return None
+                # Keep the request slot until the body can go to the pool, so
+                # bodies held in memory stay bounded even with a warm cache
+                await self._parse_slots.acquire()
+            try:
+                # Parse off the event loop so it keeps driving network I/O
+                loop = asyncio.get_running_loop()
+                chemical_metadata = await loop.run_in_executor(
+                    self._pool, _parse_chemical_metadata, html, href
+                )
+            finally:
+                self._parse_slots.release()
+            # Formulas and CAS numbers repeat across records; intern them in
+            # this process since interning does not survive the pickle back
+            if chemical_metadata.formula is not None:
+                chemical_metadata.formula = sys.intern(chemical_metadata.formula)
+            if chemical_metadata.cas is not None:
+                chemical_metadata.cas = sys.intern(chemical_metadata.cas)
+            return chemical_metadata
         except Exception as e:
-            logger.error(f"Failed to parse {href}: {str(e)}")
+            logger.error("Failed to parse %s: %s", href, e)
         return None
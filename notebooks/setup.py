@@ -1,4 +1,3 @@
-import logging
 import sys
 from pathlib import Path
 
@@ -7,7 +6,16 @@ SRC_PATH = Path(__file__).resolve().parents[1]
 if str(SRC_PATH) not in sys.path:
     sys.path.append(str(SRC_PATH))
 
+# nist_ml logs through picologging when it is installed
+try:
+    import picologging as logging
+except ImportError:
+    import logging  # type: ignore[no-redef]
+
 # Make logging visible during cell execution
 handler = logging.StreamHandler()
-handler.flush = sys.stdout.flush  # type: ignore
+try:
+    handler.flush = sys.stdout.flush  # type: ignore
+except AttributeError:  # picologging handlers are not patchable
+    pass
 logging.basicConfig(level=logging.INFO, handlers=[handler])